@@ -1,13 +1,35 @@
+import os
 import time
-import gzip
 import io
-import pandas as pd
-import requests
+import re
+import atexit
+import queue
+import sqlite3
+import threading
+import asyncio
+import aiohttp
+import xlsxwriter
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
+from xml.parsers import expat
+from lxml import etree
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+try:
+    from isal import isal_zlib as zlib  # ISA-L SIMD inflate, same API as zlib
+except ImportError:
+    import zlib
+
+try:
+    import brotli  # noqa: F401  (lets aiohttp decode Content-Encoding: br)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
 
 
 PRODUCT_PATTERNS = ["/product/", "/products/", "/p/", "/item/", "/shop/", "/details/"]
@@ -30,9 +52,42 @@ IGNORE_EXTENSIONS = (
 
 EXCLUDED_PATTERNS = ["collection", "category", "blog", "cdn", "image", "product-listing"]
 
+IGNORED_DOMAINS = ("cdn.shopify.com", "images.ctfassets.net", "assets.adobedtm.com")
+
+# --- Precompiled matchers for link filtering and robots.txt parsing ---
+_PRODUCT_RE = re.compile("|".join(map(re.escape, PRODUCT_PATTERNS)))
+_EXCL_RE = re.compile(r"collection|category|blog", re.IGNORECASE)
+_ROBOTS_SITEMAP_RE = re.compile(r"(?mi)^[ \t]*Sitemap:[ \t]*(\S+?\.xml(?:\.gz)?)\s*$")
+
 # --- Global dictionary to force Selenium for a domain once a 403 is encountered ---
 FORCE_SELENIUM = {}
 
+# --- Concurrency limits for the async fetch pipeline ---
+# The host semaphore never admits more requests than the connector has
+# connections, so admitted requests don't queue for a connection.
+CONNECTIONS_PER_HOST = 8
+MAX_CONCURRENCY_PER_HOST = CONNECTIONS_PER_HOST
+MAX_CONNECTIONS = 50
+# Per connect and per socket read, like requests' timeout=10; no cap on the whole body.
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(sock_connect=10, sock_read=10)
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 0.3
+RETRY_STATUS_FORCELIST = (502, 503, 504)
+SESSION_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+    ),
+    "Accept-Encoding": ACCEPT_ENCODING,
+}
+HOST_SEMAPHORES = {}
+GZIP_MAGIC = b"\x1f\x8b"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# --- ETag/Last-Modified store for conditional GETs on later runs ---
+VALIDATOR_DB = "sitemap_validators.sqlite"
+VALIDATOR_MAX_AGE = 7 * 86400  # seconds; entries not revalidated within this are pruned
+
 # --- ChromeDriver Setup for Selenium Fallback ---
 CHROMEDRIVER_PATH = "/path/to/your/chromedriver"  # update with your actual path
 chrome_options = Options()
@@ -47,225 +102,630 @@ chrome_options.add_argument("--no-sandbox")
 chrome_options.add_argument("--window-size=1920x1080")
 service_obj = Service(CHROMEDRIVER_PATH)
 
+# --- Pool of long-lived drivers, started lazily and shared by Selenium worker threads ---
+SELENIUM_POOL_SIZE = 2
+SELENIUM_PAGE_TIMEOUT = 10  # seconds
+_DRIVER_POOL = queue.Queue()
+_DRIVERS = []
+_DRIVERS_LOCK = threading.Lock()
+_SELENIUM_SEMAPHORE = None  # created on first use, per event loop
+
 
-def get_sitemap_content(url):
+def parse_sitemap(content):
     """
-    Fetch the content of a sitemap URL.
-    If the URL ends with .xml.gz, decompress it.
-    Otherwise, return the plain text.
+    Parse sitemap bytes in a single pass.
+    Returns (is_terminal, locs): is_terminal is True for a <urlset> root and
+    False for a <sitemapindex>. Expat is tried first since it builds no tree at
+    all; anything it can't parse goes through lxml instead.
+    In a <urlset>, locs without a product pattern are dropped during the parse
+    (they could never pass is_valid_product_link), so no stripped string or list
+    slot is created for the bulk of a terminal sitemap. This is the only raw-text
+    prefilter; later checks work on the parsed path.
     """
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-        )
-    }
-    response = requests.get(url, headers=headers, timeout=10)
+    try:
+        return parse_sitemap_expat(content)
+    except expat.ExpatError:
+        return parse_sitemap_lxml(content)
+
+
+def parse_sitemap_expat(content):
+    """
+    Extract <loc> text with expat SAX callbacks. Only the root tag name and
+    the text inside <loc> are kept; every other element is ignored.
+    """
+    locs = []
+    text = []
+    root = None
+    is_terminal = False
+    in_loc = False
+
+    def start(name, attrs):
+        nonlocal root, is_terminal, in_loc
+        if root is None:
+            root = name
+            is_terminal = name.rsplit(":", 1)[-1] == "urlset"
+        in_loc = name == "loc" or name.endswith(":loc")
+        if in_loc:
+            text.clear()
+
+    def chardata(data):
+        if in_loc:
+            text.append(data)
+
+    def end(name):
+        nonlocal in_loc
+        if in_loc:
+            in_loc = False
+            loc = text[0] if len(text) == 1 else "".join(text)
+            if is_terminal and not _PRODUCT_RE.search(loc):
+                return
+            loc = loc.strip()
+            if loc:
+                locs.append(loc)
+
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.CharacterDataHandler = chardata
+    parser.EndElementHandler = end
+    parser.Parse(content, True)
+    return is_terminal, locs
+
+
+def parse_sitemap_lxml(content):
+    """
+    Parse sitemap bytes in a single streaming pass with lxml's iterparse.
+    Used as the fallback for documents expat rejects; recover=True tolerates
+    malformed markup (e.g. Selenium page sources). Consumed entries are
+    dropped as we go so memory stays flat on large sitemaps.
+    """
+    locs = []
+    is_terminal = None
+    context = etree.iterparse(io.BytesIO(content), events=("end",), tag="{*}loc", recover=True)
+    try:
+        for _, elem in context:
+            if is_terminal is None:
+                is_terminal = etree.QName(elem.getroottree().getroot()).localname == "urlset"
+            text = elem.text
+            if text and not (is_terminal and not _PRODUCT_RE.search(text)):
+                loc = text.strip()
+                if loc:
+                    locs.append(loc)
+            entry = elem.getparent()
+            elem.clear()
+            if entry is not None:
+                while entry.getprevious() is not None:
+                    del entry.getparent()[0]
+    except etree.XMLSyntaxError as e:
+        print(f"⚠️ Could not fully parse sitemap XML: {e}")
+    if is_terminal is None:
+        root = context.root
+        is_terminal = root is not None and etree.QName(root).localname == "urlset"
+    return is_terminal, locs
+
+
+def get_host_semaphore(domain):
+    """Return the semaphore bounding concurrent fetches against a single host."""
+    if domain not in HOST_SEMAPHORES:
+        HOST_SEMAPHORES[domain] = asyncio.Semaphore(MAX_CONCURRENCY_PER_HOST)
+    return HOST_SEMAPHORES[domain]
+
+
+async def get_with_retries(session, url, read, headers=None):
+    """
+    GET a URL on the shared session and return await read(response).
+    Connection errors before the response arrives and 502/503/504 responses are
+    retried up to RETRY_TOTAL times with exponential backoff, like urllib3's
+    Retry. Timeouts and errors while reading the body are raised straight
+    away rather than downloading a multi-MB body again.
+    """
+    for attempt in range(RETRY_TOTAL + 1):
+        if attempt:
+            await asyncio.sleep(RETRY_BACKOFF_FACTOR * (2 ** (attempt - 1)))
+        try:
+            response = await session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+        except aiohttp.ClientConnectionError as e:
+            if isinstance(e, asyncio.TimeoutError) or attempt == RETRY_TOTAL:
+                raise
+            continue
+        async with response:
+            if response.status in RETRY_STATUS_FORCELIST and attempt < RETRY_TOTAL:
+                continue
+            return await read(response)
+
+
+def open_validator_db():
+    conn = sqlite3.connect(VALIDATOR_DB, timeout=30)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS validated_responses "
+        "(url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB, validated_at REAL)"
+    )
+    return conn
+
+
+def load_validated(url):
+    """Return the stored (etag, last_modified, body) for a URL, or None if missing or expired."""
+    try:
+        with closing(open_validator_db()) as conn:
+            return conn.execute(
+                "SELECT etag, last_modified, body FROM validated_responses "
+                "WHERE url = ? AND validated_at >= ?",
+                (url, time.time() - VALIDATOR_MAX_AGE),
+            ).fetchone()
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not read validator cache for {url}: {e}")
+        return None
+
+
+def store_validated(url, etag, last_modified, body):
+    try:
+        with closing(open_validator_db()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO validated_responses "
+                "(url, etag, last_modified, body, validated_at) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, time.time()),
+            )
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not write validator cache for {url}: {e}")
+
+
+def touch_validated(url):
+    """Mark a stored response as just revalidated (after a 304) so it isn't pruned."""
+    try:
+        with closing(open_validator_db()) as conn, conn:
+            conn.execute(
+                "UPDATE validated_responses SET validated_at = ? WHERE url = ?", (time.time(), url)
+            )
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not write validator cache for {url}: {e}")
+
+
+def prune_validated():
+    """Delete stored responses that haven't been revalidated within VALIDATOR_MAX_AGE."""
+    try:
+        with closing(open_validator_db()) as conn, conn:
+            conn.execute(
+                "DELETE FROM validated_responses WHERE validated_at < ?",
+                (time.time() - VALIDATOR_MAX_AGE,),
+            )
+            # Table used before entries had a timestamp; it can't be pruned by age.
+            conn.execute("DROP TABLE IF EXISTS validators")
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not prune validator cache: {e}")
+
+
+async def conditional_get(session, url, read):
+    """
+    GET a URL with If-None-Match/If-Modified-Since from the last run's response.
+    read(response) returns the body bytes (or None to skip storing); on a
+    304 Not Modified the stored body is returned without downloading it again.
+    The store is SQLite so parallel website workers can share it; this is the
+    only persistent HTTP cache.
+    """
+    validated = await asyncio.to_thread(load_validated, url)
+    headers = {}
+    if validated:
+        etag, last_modified, _ = validated
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    async def read_or_reuse(response):
+        if response.status == 304 and validated:
+            print(f"♻️ Not modified, reusing stored copy: {url}")
+            await asyncio.to_thread(touch_validated, url)
+            return validated[2]
+        body = await read(response)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if body is not None and (etag or last_modified):
+            await asyncio.to_thread(store_validated, url, etag, last_modified, body)
+        return body
+
+    return await get_with_retries(session, url, read_or_reuse, headers)
+
+
+def inflate_gzip(decompressor, data, out):
+    """
+    Feed data to a gzip decompressor, appending output to out.
+    A single decompressobj stops at the end of the first gzip member, so a new
+    one is started for every further member; zero padding between members is
+    skipped as gzip.GzipFile does. Returns the decompressor to keep feeding.
+    """
+    while data:
+        if decompressor.eof:
+            data = data.lstrip(b"\x00")
+            if not data:
+                break
+            decompressor = zlib.decompressobj(wbits=31)
+        out.append(decompressor.decompress(data))
+        data = decompressor.unused_data if decompressor.eof else b""
+    return decompressor
+
+
+async def read_sitemap_body(response):
+    """Read a sitemap response in chunks, inflating it on the fly if it is gzipped."""
     response.raise_for_status()
-    if url.endswith(".xml.gz"):
-        buf = io.BytesIO(response.content)
-        with gzip.GzipFile(fileobj=buf) as f:
-            content = f.read().decode("utf-8")
-    else:
-        content = response.text
-    return content
+    chunks = []
+    prefix = b""
+    decompressor = None
+    is_gzip = None
+    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+        if is_gzip is None:
+            # Buffer until there are enough bytes to check the gzip magic.
+            prefix += chunk
+            if len(prefix) < len(GZIP_MAGIC):
+                continue
+            is_gzip = prefix.startswith(GZIP_MAGIC)
+            if is_gzip:
+                decompressor = zlib.decompressobj(wbits=31)
+            chunk, prefix = prefix, b""
+        if is_gzip:
+            decompressor = inflate_gzip(decompressor, chunk, chunks)
+        else:
+            chunks.append(chunk)
+    if prefix:
+        chunks.append(prefix)
+    if decompressor:
+        chunks.append(decompressor.flush())
+    return b"".join(chunks)
+
+
+async def get_sitemap_content(url, session):
+    """
+    Fetch the raw content of a sitemap URL as bytes.
+    aiohttp undoes any Content-Encoding; a .xml.gz file served without one still
+    arrives gzipped, so it is inflated here chunk by chunk as it downloads
+    (detected by the gzip magic bytes) rather than buffered and then unpacked.
+    The bytes are not text-decoded; the XML parser (expat, or lxml as the
+    fallback) reads the declared character encoding itself.
+    The visited set already stops a URL being fetched twice in one crawl, so
+    nothing is held in memory here; later runs revalidate with a conditional GET.
+    """
+    async with get_host_semaphore(urlparse(url).netloc):
+        return await conditional_get(session, url, read_sitemap_body)
+
+
+def acquire_driver():
+    """
+    Take a driver from the pool, starting a new one only while the pool is
+    below SELENIUM_POOL_SIZE; otherwise wait for one to be released. The wait
+    re-checks the pool size periodically so a discarded driver's slot is refilled.
+    """
+    while True:
+        try:
+            return _DRIVER_POOL.get_nowait()
+        except queue.Empty:
+            pass
+        with _DRIVERS_LOCK:
+            if len(_DRIVERS) < SELENIUM_POOL_SIZE:
+                driver = webdriver.Chrome(service=service_obj, options=chrome_options)
+                _DRIVERS.append(driver)
+                return driver
+        try:
+            return _DRIVER_POOL.get(timeout=1)
+        except queue.Empty:
+            continue
+
+
+def release_driver(driver):
+    _DRIVER_POOL.put(driver)
+
+
+def discard_driver(driver):
+    """Quit a broken driver and drop it from the pool so a fresh one can replace it."""
+    with _DRIVERS_LOCK:
+        if driver in _DRIVERS:
+            _DRIVERS.remove(driver)
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+def quit_drivers():
+    """Shut down every pooled driver."""
+    with _DRIVERS_LOCK:
+        for driver in _DRIVERS:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        _DRIVERS.clear()
+    while not _DRIVER_POOL.empty():
+        _DRIVER_POOL.get_nowait()
+
+
+atexit.register(quit_drivers)
 
 
 def get_sitemap_content_with_selenium(url):
-    """Fallback: Fetch sitemap content using Selenium."""
+    """Fallback: Fetch sitemap content using a pooled Selenium driver."""
     print(f"📄 Selenium fetching content: {url}")
-    driver = webdriver.Chrome(service=service_obj, options=chrome_options)
-    driver.get(url)
-    time.sleep(3)
-    content = driver.page_source
-    driver.quit()
+    driver = acquire_driver()
+    try:
+        driver.get(url)
+        try:
+            WebDriverWait(driver, SELENIUM_PAGE_TIMEOUT).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+        except TimeoutException:
+            print(f"⚠️ Page did not finish loading in {SELENIUM_PAGE_TIMEOUT}s, using what we have: {url}")
+        content = driver.page_source.encode("utf-8")
+    except Exception:
+        # WebDriverException for a crashed tab/session; a dead chromedriver
+        # surfaces as a urllib3 error instead. Either way, don't pool it again.
+        discard_driver(driver)
+        raise
+    release_driver(driver)
     return content
 
 
-def get_sitemap_links_with_selenium(url):
-    """Fallback: Fetch sitemap links using Selenium."""
-    print(f"📄 Selenium fetching links: {url}")
-    driver = webdriver.Chrome(service=service_obj, options=chrome_options)
-    driver.get(url)
-    time.sleep(3)
-    soup = BeautifulSoup(driver.page_source, "xml")
-    driver.quit()
-    return [loc.text.strip() for loc in soup.find_all("loc")]
+def get_selenium_semaphore():
+    """Return the semaphore bounding in-flight Selenium fetches to the driver pool size."""
+    global _SELENIUM_SEMAPHORE
+    if _SELENIUM_SEMAPHORE is None:
+        _SELENIUM_SEMAPHORE = asyncio.Semaphore(SELENIUM_POOL_SIZE)
+    return _SELENIUM_SEMAPHORE
 
 
-def get_sitemap_links(url):
+async def fetch_with_selenium(url):
     """
-    Fetch all links from a given sitemap URL.
-    Uses requests (and get_sitemap_content) unless the domain is flagged for Selenium.
+    Run the blocking Selenium fetch in a worker thread. Tasks wait on the
+    semaphore rather than in _DRIVER_POOL.get(), so they don't tie up default
+    executor threads needed for parsing and the validator store.
+    """
+    async with get_selenium_semaphore():
+        return await asyncio.to_thread(get_sitemap_content_with_selenium, url)
+
+
+async def fetch_sitemap(url, session):
+    """
+    Fetch a sitemap once, returning its bytes (or None on failure).
+    Uses aiohttp unless the domain is flagged for Selenium; a 403 or a
+    connection error flags the domain and retries through Selenium.
+    Selenium is blocking, so it runs in a worker thread.
     """
     domain = urlparse(url).netloc
     if FORCE_SELENIUM.get(domain, False):
-        return get_sitemap_links_with_selenium(url)
+        try:
+            return await fetch_with_selenium(url)
+        except Exception as e:
+            print(f"❌ Selenium fetch failed for {url}: {e}")
+            return None
     print(f"📄 Fetching: {url}")
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-        )
-    }
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 403:
+        return await get_sitemap_content(url, session)
+    except aiohttp.ClientResponseError as e:
+        if e.status == 403:
             print(f"❌ 403 Forbidden for {url}. Flagging domain {domain} for Selenium fallback.")
-            FORCE_SELENIUM[domain] = True
-            return get_sitemap_links_with_selenium(url)
-        elif response.status_code != 200:
-            print(f"❌ Failed to fetch {url} (status code {response.status_code}).")
-            return []
-    except requests.RequestException as e:
+        else:
+            print(f"❌ Failed to fetch {url} (status code {e.status}).")
+            return None
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         print(f"❌ Error fetching {url}: {e}. Falling back to Selenium.")
-        FORCE_SELENIUM[domain] = True
-        return get_sitemap_links_with_selenium(url)
-    try:
-        content = get_sitemap_content(url)
     except Exception as e:
         print(f"❌ Error processing sitemap content from {url}: {e}")
-        return []
-    soup = BeautifulSoup(content, "xml")
-    return [loc.text.strip() for loc in soup.find_all("loc")]
-
-
-def is_terminal_sitemap(url):
+        return None
+    FORCE_SELENIUM[domain] = True
     try:
-        content = get_sitemap_content(url)
+        return await fetch_with_selenium(url)
     except Exception as e:
-        print(f"❌ Error in is_terminal_sitemap for {url}: {e}. Falling back to Selenium.")
-        try:
-            content = get_sitemap_content_with_selenium(url)
-        except Exception as e2:
-            print(f"❌ Selenium fallback also failed for {url}: {e2}")
-            return False
-    soup = BeautifulSoup(content, "xml")
-    return bool(soup.find("urlset"))
+        print(f"❌ Selenium fallback also failed for {url}: {e}")
+        return None
+
+
+async def fetch_and_parse(url, session):
+    """
+    Fetch a sitemap once and return (is_terminal, locs) from a single parse.
+    Parsing runs in a worker thread so large sitemaps don't stall the event loop.
+    """
+    content = await fetch_sitemap(url, session)
+    if content is None:
+        return False, []
+    return await asyncio.to_thread(parse_sitemap, content)
 
 
-def should_search_deeper(link):
+def should_search_deeper(link, path_lower):
     """
     Check if the link should be recursively searched.
+    path_lower is the link's already-parsed, lowercased path.
     """
-    parsed = urlparse(link)
-    path = parsed.path.lower()
-    return ".xml" in path and any(pattern in link.lower() for pattern in PRODUCT_SITEMAP_PATTERNS)
+    return ".xml" in path_lower and any(pattern in link.lower() for pattern in PRODUCT_SITEMAP_PATTERNS)
 
 
-def is_valid_product_link(link, base_domain):
-    parsed_url = urlparse(link)
-    if base_domain not in parsed_url.netloc:
-        return False
-    if any(parsed_url.path.lower().endswith(ext) for ext in IGNORE_EXTENSIONS):
-        return False
-    # Exclude links from known asset/CDN domains
-    IGNORED_DOMAINS = ["cdn.shopify.com", "images.ctfassets.net", "assets.adobedtm.com"]
-    if any(ignored in parsed_url.netloc for ignored in IGNORED_DOMAINS):
-        return False
+def is_valid_product_link(link, base_domain, parsed_url=None):
+    """
+    Pass parsed_url when the caller has already run urlparse on link.
+    Checks run in order of how many links they reject: the product-pattern
+    search on the path first, then extensions, exclusions and the domain.
+    """
+    if parsed_url is None:
+        parsed_url = urlparse(link)
+    path = parsed_url.path
     # Must match one of the product patterns
-    if not any(pattern in parsed_url.path for pattern in PRODUCT_PATTERNS):
+    if not _PRODUCT_RE.search(path):
+        return False
+    if path.lower().endswith(IGNORE_EXTENSIONS):
         return False
     # Exclude unwanted patterns (e.g., collections, categories, blogs)
-    if any(excl in parsed_url.path.lower() for excl in ["collection", "category", "blog"]):
+    if _EXCL_RE.search(path):
+        return False
+    netloc = parsed_url.netloc
+    if base_domain not in netloc:
         return False
-    return True
+    # Exclude links from known asset/CDN domains
+    return not any(ignored in netloc for ignored in IGNORED_DOMAINS)
 
 
-def fetch_product_links_from_sitemaps(sitemap_url, visited_sitemaps=None):
+async def fetch_product_links_from_sitemaps(sitemap_url, session, visited_sitemaps=None):
     """
-    Recursively fetch product links from product sitemaps.
-    If the sitemap is terminal (<urlset>), return its links directly (after filtering).
+    Fetch product links from a sitemap and every product sub-sitemap below it.
+    The tree is walked iteratively as a concurrent frontier: each sitemap is a
+    task, and as soon as one finishes its sub-sitemaps are scheduled.
+    If a sitemap is terminal (<urlset>), its links are collected (after filtering).
     Otherwise, for each link:
-      - If it contains ".xml" and should be searched deeper, process it recursively.
+      - If it contains ".xml" and should be searched deeper, schedule it.
       - Else, if it is a valid product link, add it.
+    visited_sitemaps is only touched between awaits, so it needs no lock even
+    when shared by concurrent crawls.
     """
     if visited_sitemaps is None:
         visited_sitemaps = set()
-    normalized_sitemap = sitemap_url.rstrip("/")
-    if normalized_sitemap in visited_sitemaps:
-        print(f"⚠️ Skipping already processed sitemap: {normalized_sitemap}")
-        return []
-    visited_sitemaps.add(normalized_sitemap)
-    base_domain = urlparse(sitemap_url).netloc
-    all_links = get_sitemap_links(sitemap_url)
     product_links = set()
-    sub_sitemaps = set()
-    if is_terminal_sitemap(sitemap_url):
-        print(f"📄 Terminal sitemap detected: {normalized_sitemap}")
-        for link in all_links:
-            if link.startswith("/"):
-                link = urljoin(sitemap_url, link)
-            normalized_link = link.rstrip("/")
-            if is_valid_product_link(normalized_link, base_domain):
-                product_links.add(normalized_link)
-        return list(product_links)
-    else:
-        for link in all_links:
-            if link.startswith("/"):
-                link = urljoin(sitemap_url, link)
-            normalized_link = link.rstrip("/")
-            if normalized_link == normalized_sitemap:
+    pending = {}
+
+    def schedule(url):
+        normalized = url.rstrip("/")
+        if normalized in visited_sitemaps:
+            print(f"⚠️ Skipping already processed sitemap: {normalized}")
+            return
+        visited_sitemaps.add(normalized)
+        pending[asyncio.ensure_future(fetch_and_parse(url, session))] = (url, normalized)
+
+    schedule(sitemap_url)
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            url, normalized_sitemap = pending.pop(task)
+            terminal, all_links = task.result()
+            base_domain = urlparse(url).netloc
+            if terminal:
+                print(f"📄 Terminal sitemap detected: {normalized_sitemap}")
+                normalized_links = [
+                    (urljoin(url, link) if link.startswith("/") else link).rstrip("/")
+                    for link in all_links
+                ]
+                product_links.update(
+                    link for link in normalized_links if is_valid_product_link(link, base_domain)
+                )
                 continue
-            parsed = urlparse(normalized_link)
-            path = parsed.path.lower()
-            if ".xml" in path and should_search_deeper(normalized_link):
-                print(f"🔍 Recursing into sitemap: {normalized_link}")
-                sub_sitemaps.add(normalized_link)
-            else:
-                if is_valid_product_link(normalized_link, base_domain):
-                    product_links.add(normalized_link)
-        for sub_sitemap in sub_sitemaps:
-            product_links.update(fetch_product_links_from_sitemaps(sub_sitemap, visited_sitemaps))
-        return list(product_links)
-
-
-def get_sitemaps_from_robots(website_url):
+            sub_sitemaps = set()
+            for link in all_links:
+                if link.startswith("/"):
+                    link = urljoin(url, link)
+                normalized_link = link.rstrip("/")
+                if normalized_link == normalized_sitemap:
+                    continue
+                parsed = urlparse(normalized_link)
+                path = parsed.path.lower()
+                if should_search_deeper(normalized_link, path):
+                    sub_sitemaps.add(normalized_link)
+                else:
+                    if is_valid_product_link(normalized_link, base_domain, parsed):
+                        product_links.add(normalized_link)
+            for sub_sitemap in sub_sitemaps:
+                if sub_sitemap not in visited_sitemaps:
+                    print(f"🔍 Recursing into sitemap: {sub_sitemap}")
+                schedule(sub_sitemap)
+    return list(product_links)
+
+
+async def get_sitemaps_from_robots(website_url, session):
     robots_url = website_url.rstrip("/") + "/robots.txt"
     print(f"📄 Fetching robots.txt: {robots_url}")
+
+    async def read(response):
+        if response.status != 200:
+            print(f"❌ Failed to fetch robots.txt from {robots_url} (status code {response.status})")
+            return None
+        return await response.read()
+
     try:
-        response = requests.get(robots_url, timeout=10)
-        if response.status_code != 200:
-            print(f"❌ Failed to fetch robots.txt from {robots_url} (status code {response.status_code})")
-            return []
-    except requests.RequestException as e:
+        body = await conditional_get(session, robots_url, read)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         print(f"❌ Error fetching robots.txt from {robots_url}: {e}")
         return []
-    sitemap_urls = []
-    for line in response.text.splitlines():
-        if line.lower().startswith("sitemap:"):
-            sitemap_url = line.split(":", 1)[1].strip()
-            if sitemap_url.endswith(".xml") or sitemap_url.endswith(".xml.gz"):
-                sitemap_urls.append(sitemap_url)
-    return list(set(sitemap_urls))
+    if body is None:
+        return []
+    text = body.decode("utf-8", errors="replace")
+    return list(set(_ROBOTS_SITEMAP_RE.findall(text)))
 
 
 def save_to_excel(links, filename="filtered_products.xlsx"):
-    """Save product links to an Excel file."""
-    df = pd.DataFrame(links, columns=["Product Link"])
-    df.to_excel(filename, index=False)
+    """Save product links to an Excel file, streaming rows in constant-memory mode."""
+    workbook = xlsxwriter.Workbook(filename, {"constant_memory": True})
+    worksheet = workbook.add_worksheet()
+    worksheet.write_string(0, 0, "Product Link")
+    for row, link in enumerate(links, 1):
+        worksheet.write_string(row, 0, link)
+    workbook.close()
     print(f"✅ Saved {len(links)} product links to {filename}")
 
 
+def create_session():
+    """
+    Create the shared HTTP session. It is reused for the whole run so
+    keep-alive connections (and their TLS handshakes) are pooled per host.
+    """
+    connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, limit_per_host=CONNECTIONS_PER_HOST)
+    return aiohttp.ClientSession(connector=connector, headers=SESSION_HEADERS)
+
+
+async def crawl_sitemap(sitemap_url, session, visited_sitemaps, currWebsite):
+    print(f"\n🔍 Crawling {sitemap_url} for {currWebsite}...")
+    start_time = time.time()
+    product_links = await fetch_product_links_from_sitemaps(sitemap_url, session, visited_sitemaps)
+    elapsed_time = time.time() - start_time
+    print(f"✅ Found {len(product_links)} valid product links from {sitemap_url} in {elapsed_time:.2f} seconds")
+    return product_links
+
+
+async def crawl_website(website):
+    """Crawl every sitemap listed in a website's robots.txt concurrently."""
+    print(f"\n========== Processing {website} ==========")
+    domain = urlparse(website).netloc
+    currWebsite = domain[4:] if domain.startswith("www.") else domain
+    await asyncio.to_thread(prune_validated)
+    async with create_session() as session:
+        sitemaps = await get_sitemaps_from_robots(website, session)
+        print(f"🔍 Found {len(sitemaps)} sitemap(s) from robots.txt")
+        visited_sitemaps = set()
+        results = await asyncio.gather(
+            *(crawl_sitemap(s, session, visited_sitemaps, currWebsite) for s in sitemaps)
+        )
+    all_product_links = set()
+    for product_links in results:
+        all_product_links.update(product_links)
+    filename = f"{currWebsite}_products.xlsx"
+    save_to_excel(list(all_product_links), filename=filename)
+    return filename, len(all_product_links)
+
+
+def process_one_website(website):
+    """
+    Worker entry point: run one website's crawl on its own event loop.
+    A worker may handle several websites, and asyncio semaphores are bound to
+    the loop they were first used on, so the per-host and Selenium semaphores
+    are reset before each asyncio.run.
+    Pool workers don't run atexit handlers, so Selenium drivers are quit here.
+    """
+    global _SELENIUM_SEMAPHORE
+    HOST_SEMAPHORES.clear()
+    _SELENIUM_SEMAPHORE = None
+    try:
+        return asyncio.run(crawl_website(website))
+    finally:
+        quit_drivers()
+
+
 def main():
     websites = []
 
-    for website in websites:
-        print(f"\n========== Processing {website} ==========")
-        sitemaps = get_sitemaps_from_robots(website)
-        print(f"🔍 Found {len(sitemaps)} sitemap(s) from robots.txt")
-        all_product_links = set()
-        domain = urlparse(website).netloc
-        currWebsite = domain[4:] if domain.startswith("www.") else domain
-        for sitemap_url in sitemaps:
-            print(f"\n🔍 Crawling {sitemap_url} for {currWebsite}...")
-            start_time = time.time()
-            product_links = fetch_product_links_from_sitemaps(sitemap_url)
-            elapsed_time = time.time() - start_time
-            all_product_links.update(product_links)
-            print(f"✅ Found {len(product_links)} valid product links from {sitemap_url} in {elapsed_time:.2f} seconds")
-        filename = f"{currWebsite}_products.xlsx"
-        save_to_excel(list(all_product_links), filename=filename)
+    if not websites:
+        return
+    max_workers = min(len(websites), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(process_one_website, w): w for w in websites}
+        for future in as_completed(futures):
+            website = futures[future]
+            try:
+                filename, count = future.result()
+            except Exception as e:
+                print(f"❌ Failed to process {website}: {e}")
+                continue
+            print(f"🏁 Finished {website}: {count} product links in {filename}")
 
 
 if __name__ == "__main__":